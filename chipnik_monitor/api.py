@@ -4,14 +4,12 @@ import json
 import os
 import calendar
 import threading
-import concurrent.futures
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Union, Tuple
 from uuid import uuid4
 
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 from fastapi import BackgroundTasks, FastAPI, HTTPException
 from fastapi.encoders import jsonable_encoder
@@ -152,17 +150,19 @@ def _load_ml_model() -> Optional[Prophet]:
             return None
 
 
-def _calculate_vpd(temperature: float, humidity: float) -> float:
-    """Calculate Vapor Pressure Deficit (VPD)."""
-    try:
-        # Saturation vapor pressure (kPa) using Magnus formula
-        svp = 0.6112 * np.exp(17.67 * temperature / (temperature + 243.5))
-        # Actual vapor pressure (kPa)
-        avp = svp * (humidity / 100.0)
-        # VPD (kPa)
-        return max(0, svp - avp)
-    except Exception:
-        return 0.0
+def _calculate_vpd(temperature: pd.Series, humidity: pd.Series) -> pd.Series:
+    """Calculate Vapor Pressure Deficit (VPD) for whole columns at once."""
+    # Saturation vapor pressure (kPa) using Magnus formula
+    svp = 0.6112 * np.exp(17.67 * temperature / (temperature + 243.5))
+    # Actual vapor pressure (kPa)
+    avp = svp * (humidity / 100.0)
+    # VPD (kPa); fmax turns missing inputs into 0 like the old per-row fallback
+    return np.fmax(0.0, svp - avp)
+
+
+def _calculate_gdd(temperature: pd.Series) -> pd.Series:
+    """Growing degree days above a 10 deg C base; missing temperatures count as 0."""
+    return (temperature - 10).clip(lower=0).fillna(0)
 
 
 def _add_growing_season_indicator(df: pd.DataFrame) -> pd.DataFrame:
@@ -225,13 +225,8 @@ def _prepare_ml_features(history_data: List[Dict[str, Any]], weather_df: pd.Data
         df['clarity_index'] = (df.get('clarity_pct', pd.Series([70.0] * len(df))).fillna(70.0) / 100.0)
         
         # Calculate derived weather variables
-        df['vapor_pressure_deficit'] = df.apply(
-            lambda row: _calculate_vpd(row['temperature_mean'], row['humidity']),
-            axis=1
-        )
-        df['growing_degree_days'] = df['temperature_mean'].apply(
-            lambda x: max(0, x - 10) if pd.notna(x) else 0
-        )
+        df['vapor_pressure_deficit'] = _calculate_vpd(df['temperature_mean'], df['humidity'])
+        df['growing_degree_days'] = _calculate_gdd(df['temperature_mean'])
         df['precipitation'] = 0.0  # Default value if not available
         
     else:
@@ -412,15 +407,13 @@ def _predict_ndvi_with_ml(history_data: List[Dict[str, Any]], weather_df: pd.Dat
             historical_monthly = weather_df_copy.groupby(weather_df_copy['date'].dt.month)[numeric_columns].mean()
             future_df['month'] = future_df['ds'].dt.month
             
-            # Map historical weather patterns to future months
-            for month in range(1, 13):
-                if month in historical_monthly.index:
-                    mask = future_df['month'] == month
-                    future_df.loc[mask, 'temperature_mean'] = historical_monthly.loc[month, 'temperature_deg_c']
-                    future_df.loc[mask, 'humidity'] = historical_monthly.loc[month, 'humidity_pct']
-                    future_df.loc[mask, 'cloudcover_mean'] = historical_monthly.loc[month, 'cloudcover_pct']
-                    future_df.loc[mask, 'wind_speed_mean'] = historical_monthly.loc[month, 'wind_speed_mps']
-                    future_df.loc[mask, 'clarity_index'] = historical_monthly.loc[month, 'clarity_pct'] / 100.0
+            # Map historical weather patterns to future months; months without history stay NaN
+            future_month = future_df['month']
+            future_df['temperature_mean'] = future_month.map(historical_monthly['temperature_deg_c'])
+            future_df['humidity'] = future_month.map(historical_monthly['humidity_pct'])
+            future_df['cloudcover_mean'] = future_month.map(historical_monthly['cloudcover_pct'])
+            future_df['wind_speed_mean'] = future_month.map(historical_monthly['wind_speed_mps'])
+            future_df['clarity_index'] = future_month.map(historical_monthly['clarity_pct']) / 100.0
         else:
             # Use default seasonal patterns
             future_df['temperature_mean'] = 15 + 10 * np.sin(2 * np.pi * (future_df['ds'].dt.dayofyear - 80) / 365)
@@ -430,13 +423,8 @@ def _predict_ndvi_with_ml(history_data: List[Dict[str, Any]], weather_df: pd.Dat
             future_df['clarity_index'] = 0.7
         
         # Calculate derived weather variables
-        future_df['vapor_pressure_deficit'] = future_df.apply(
-            lambda row: _calculate_vpd(row['temperature_mean'], row['humidity']),
-            axis=1
-        )
-        future_df['growing_degree_days'] = future_df['temperature_mean'].apply(
-            lambda x: max(0, x - 10)
-        )
+        future_df['vapor_pressure_deficit'] = _calculate_vpd(future_df['temperature_mean'], future_df['humidity'])
+        future_df['growing_degree_days'] = _calculate_gdd(future_df['temperature_mean'])
         future_df['precipitation'] = 0.0
         
         # Add regional features
@@ -571,18 +559,12 @@ def _ensure_token() -> str:
 
 
 def _geometry_from_geojson(raw_geojson: Union[str, Dict[str, Any]]):
-    if isinstance(raw_geojson, str):
-        try:
-            payload = json.loads(raw_geojson)
-        except json.JSONDecodeError as exc:
-            raise HTTPException(status_code=400, detail=f"Invalid GeoJSON payload: {exc}") from exc
-    elif isinstance(raw_geojson, dict):
-        payload = raw_geojson
-    else:
+    if not isinstance(raw_geojson, (str, dict)):
         raise HTTPException(status_code=400, detail="GeoJSON payload must be an object or JSON string")
 
+    # JSON strings are parsed by GEOS directly rather than being decoded into Python dicts first
     try:
-        return monitor.extract_geometry_from_geojson(payload)
+        return monitor.extract_geometry_from_geojson(raw_geojson)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
@@ -597,7 +579,7 @@ def _fetch_weather_history(lat: float, lon: float, start_date: datetime, end_dat
         "timezone": "auto",
     }
     try:
-        response = requests.get("https://archive-api.open-meteo.com/v1/archive", params=params, timeout=30)
+        response = monitor.get_http_session().get("https://archive-api.open-meteo.com/v1/archive", params=params, timeout=30)
         response.raise_for_status()
     except Exception as exc:
         monitor.logger.exception("Weather API request failed for lat=%s lon=%s", lat, lon)
@@ -804,54 +786,19 @@ def _generate_report(geojson_payload: Union[str, Dict[str, Any]], yield_profile:
     report_records: List[Dict[str, Any]] = []
 
     enumerated_rows = list(enumerate(rows))
-    default_worker_cap = 1 if getattr(monitor, "_CLOUD_RUN_SERVICE", None) else 8
-    worker_cap_raw = os.getenv("WORKER_CAP", "").strip()
-    if worker_cap_raw:
-        try:
-            worker_cap = max(1, int(worker_cap_raw))
-            monitor.logger.info("WORKER_CAP=%s", worker_cap_raw)
-        except ValueError:
-            monitor.logger.warning("Invalid WORKER_CAP=%s; falling back to default", worker_cap_raw)
-            worker_cap = default_worker_cap
-    else:
-        worker_cap = default_worker_cap
-    max_workers = max(1, min(worker_cap, len(enumerated_rows)))
-
     results_pairs: List[Tuple[int, Any, Dict[str, Any]]] = []
 
-    def _compute_row(item: Tuple[int, Any]) -> Optional[Dict[str, Any]]:
-        idx, row = item
-        return monitor.compute_index_for_row(row, index_types=index_types, bbox=bbox, token=token)
+    batch_reports = monitor.compute_index_batch(rows, index_types=index_types, bbox=bbox, token=token)
+    if not any(batch_reports) and len(rows) > 1 and monitor.resolve_worker_cap() > 1:
+        monitor.logger.info("Parallel NDVI returned no reports; retrying sequential execution")
+        batch_reports = monitor.compute_index_batch(rows, index_types=index_types, bbox=bbox, token=token,
+                                                    max_workers=1)
 
-    if max_workers > 1:
-        try:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_map = {executor.submit(_compute_row, item): item for item in enumerated_rows}
-                for future in concurrent.futures.as_completed(future_map):
-                    idx, row = future_map[future]
-                    try:
-                        report = future.result()
-                    except Exception:
-                        monitor.logger.exception("NDVI worker failed for row %s", idx)
-                        continue
-                    if report:
-                        report_records.append(report)
-                        results_pairs.append((idx, row, report))
-        except Exception:
-            monitor.logger.exception("Parallel NDVI computation failed; falling back to sequential execution")
-            results_pairs.clear()
-
-    if not results_pairs:
-        for idx, row in enumerated_rows:
-            try:
-                report = monitor.compute_index_for_row(row, index_types=index_types, bbox=bbox, token=token)
-            except Exception:
-                monitor.logger.exception("Sequential NDVI computation failed for row %s", idx)
-                continue
-            if not report:
-                continue
-            report_records.append(report)
-            results_pairs.append((idx, row, report))
+    for (idx, row), report in zip(enumerated_rows, batch_reports):
+        if not report:
+            continue
+        report_records.append(report)
+        results_pairs.append((idx, row, report))
 
     results_pairs.sort(key=lambda item: item[0])
 
@@ -1,14 +1,18 @@
 ﻿from enum import Enum
 import streamlit as st
+from streamlit import runtime as st_runtime
 import pandas as pd
 import numpy as np
 from datetime import date, datetime, timedelta
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pydeck as pdk
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyproj import Transformer
 from pystac_client import Client
 import rasterio
-from rasterio.warp import transform_bounds
+from rasterio.windows import Window
 try:
     from rasterio.session import AWSSession  # type: ignore
 except ImportError:
@@ -18,14 +22,28 @@ else:
         import boto3  # type: ignore  # noqa: F401
     except ImportError:
         AWSSession = None  # type: ignore
+try:
+    import numexpr as ne  # type: ignore
+except ImportError:
+    ne = None  # type: ignore
+try:
+    from numba import njit  # type: ignore
+except ImportError:
+    njit = None  # type: ignore
+import shapely
 from shapely.geometry import shape, box, mapping
 from shapely.geometry.base import BaseGeometry
-from shapely.ops import unary_union
+from shapely.errors import GEOSException
 from pathlib import Path
 from collections import OrderedDict
-from functools import partial
+from functools import lru_cache, partial
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+import gc
 import hashlib
+import io
 import json
 import logging
 import concurrent.futures
@@ -36,10 +54,21 @@ except ModuleNotFoundError:
     from anomalies import detect_anomalies
 import calendar
 import os
+import re
+import shutil
+import textwrap
+import threading
 import time
 from typing import List, Tuple, Optional, Union, Dict, Any
 import warnings
+import zipfile
 warnings.filterwarnings("ignore")
+# Copy-on-Write lets derived frames (renames, column subsets) share buffers with their source.
+# Only enabled under the Streamlit runtime so importers such as the FastAPI service keep their pandas mode.
+if st_runtime.exists():
+    pd.set_option("mode.copy_on_write", True)
+# Read .env once per process; variables already set in the environment win.
+load_dotenv(Path(".env"), override=False)
 # Configure logger
 logger = logging.getLogger('chipnik_monitor')
 if not logger.handlers:
@@ -53,6 +82,11 @@ logger.setLevel(logging.INFO if _CLOUD_RUN_SERVICE else logging.DEBUG)
 def log_progress(message: str) -> None:
     logger.log(logging.INFO, message)
 
+# Minimum gap between progress widget updates (~10 Hz); each update is a websocket round-trip.
+PROGRESS_UPDATE_INTERVAL_SECONDS = 0.1
+# Run a collection every this many finished scenes to hand fragmented arenas back early.
+GC_EVERY_N_SCENES = 16
+
 DEFAULT_CENTER_LON = -122.09261814845487
 DEFAULT_CENTER_LAT = 47.60464601773639
 DEFAULT_CORNER_HALF_WIDTH_DEG = 0.055
@@ -79,7 +113,87 @@ DAYS_BACK_LIMIT = max(1, min(4500, DAYS_BACK_LIMIT))
 APP_NAME = "HLS Crop Monitor"
 APP_LOGO_PATH = Path("media") / "small_logo.png"
 
-def extract_geometry_from_geojson(geojson_obj: dict) -> BaseGeometry:
+# Static markdown shown by the dashboard; built once at import rather than on every rerun.
+_TOKEN_HELP_MD = textwrap.dedent("""
+    **How to obtain a token:**
+    1. Create an account at https://urs.earthdata.nasa.gov/
+    2. Open Profile -> Generate Token
+    3. Copy the Bearer Token into your .env file as EARTHDATA_BEARER_TOKEN
+    """)
+
+_WELCOME_MD = textwrap.dedent("""
+    ### Welcome to HLS Crop Monitor!
+
+    **What you can do with this app:**
+    - Retrieve HLS (Harmonized Landsat Sentinel-2) imagery at 30 m resolution
+    - Analyse NDVI time series to track canopy vigor
+    - Compare management zones across multiple observation dates
+
+    **To get started:**
+    1. Request a free token at https://urs.earthdata.nasa.gov/
+    2. Provide the area of interest in the sidebar
+    3. Choose the time range
+    4. Select "Search scenes"
+
+    **NDVI interpretation guidance:**
+    - < 0.2: Bare soil, standing water, or senescing vegetation
+    - 0.2-0.4: Emerging canopy or stressed plants
+    - 0.4-0.6: Healthy vegetative growth
+    - > 0.6: Peak foliage; monitor for disease and nutrient demand
+    """)
+
+_SAMPLE_AOIS_MD = textwrap.dedent("""
+    **Sun Valley Potatoes (ID, USA)**  
+    - Use the bundled `geojsons/sun_valley_potatoes.json`
+    - Suggested season: May-August
+    """)
+
+_SAMPLE_AOI_SNAKE_RIVER_MD = textwrap.dedent("""
+    **Snake River Plain Center Pivots (ID, USA)**  
+    Large irrigated potato blocks near American Falls
+    - Center: 42.7730 deg N, -112.8480 deg W
+    - Suggested radius: 6 km
+    """)
+
+_SAMPLE_AOI_RED_RIVER_MD = textwrap.dedent("""
+    **Red River Valley Fields (ND/MN, USA)**  
+    Loamy soils with intensive potato production
+    - Center: 47.8100 deg N, -96.8200 deg W
+    - Suggested radius: 6 km
+    """)
+
+_FOOTER_HTML = """
+<div style='text-align: center; color: gray;'>
+    <p>HLS Crop Monitor v1.0 | Data source: NASA HLS v2.0 | Built with Streamlit</p>
+    <p><small>Data provided by NASA LP DAAC via the CMR-STAC API</small></p>
+</div>
+"""
+
+# Matches a root object whose first key is "type", which is how GeoJSON is conventionally written.
+_LEADING_TYPE_RE = re.compile(r'\s*\{\s*"type"\s*:\s*"(\w+)"')
+
+
+def extract_geometry_from_geojson(geojson_obj: Union[str, dict]) -> BaseGeometry:
+    if isinstance(geojson_obj, str):
+        # GEOS parses the raw text directly when the root type can be read off the head of the
+        # document; FeatureCollections come back as a GeometryCollection and are dissolved.
+        leading_type = _LEADING_TYPE_RE.match(geojson_obj)
+        if leading_type is not None:
+            try:
+                geometry = shapely.from_geojson(geojson_obj)
+            except GEOSException:
+                # GEOS rejects valid input such as features with null geometry; the dict path skips those.
+                geometry = None
+            if geometry is not None:
+                if leading_type.group(1) == "FeatureCollection":
+                    geometry = shapely.union_all(geometry.geoms)
+                if geometry.is_empty:
+                    raise ValueError("GeoJSON contains no valid geometries")
+                return geometry
+        try:
+            geojson_obj = json.loads(geojson_obj)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid GeoJSON: {exc}") from exc
     geojson_type = (geojson_obj or {}).get("type") if isinstance(geojson_obj, dict) else None
     if geojson_type == "Feature":
         geometry = geojson_obj.get("geometry")
@@ -97,7 +211,7 @@ def extract_geometry_from_geojson(geojson_obj: dict) -> BaseGeometry:
                 geometries.append(shape(geometry))
         if not geometries:
             raise ValueError("FeatureCollection contains no valid geometries")
-        return unary_union(geometries)
+        return shapely.union_all(geometries)
     if isinstance(geojson_obj, dict) and geojson_type:
         return shape(geojson_obj)
     raise ValueError("Unsupported GeoJSON structure; expected Feature, FeatureCollection, or geometry")
@@ -125,18 +239,24 @@ def geometry_to_polygons(geometry: BaseGeometry) -> List[List[List[float]]]:
         return polygons
     return []
 
+
+@st.cache_data(show_spinner=False)
+def _aoi_polygons(aoi_wkb: bytes) -> List[List[List[float]]]:
+    """geometry_to_polygons memoised on the AOI's WKB, so unchanged AOIs skip the Shapely walk."""
+
+    return geometry_to_polygons(shapely.from_wkb(aoi_wkb))
+
 GEOJSON_DIR = Path("geojsons")
+GEOJSON_SUFFIXES = {".geojson", ".json"}
 
 def list_geojson_files(directory: Path) -> List[Path]:
     if not directory.exists():
         return []
-    candidates: List[Path] = []
-    for pattern in ("*.geojson", "*.GeoJSON", "*.json", "*.JSON"):
-        candidates.extend(directory.glob(pattern))
-    unique = {}
-    for file_path in candidates:
-        unique[file_path.name] = file_path
-    return sorted(unique.values(), key=lambda f: f.name.lower())
+    candidates = [
+        file_path for file_path in directory.iterdir()
+        if file_path.suffix.lower() in GEOJSON_SUFFIXES and file_path.is_file()
+    ]
+    return sorted(candidates, key=lambda f: f.name.lower())
 
 def _determine_cache_root() -> Path:
     override = os.getenv("CACHE_ROOT")
@@ -148,14 +268,28 @@ def _determine_cache_root() -> Path:
 
 CACHE_ROOT = _determine_cache_root()
 CACHE_ROOT.mkdir(parents=True, exist_ok=True)
-INDEX_CACHE_VERSION = "1"
+INDEX_CACHE_VERSION = "3"
+# Cached index rasters are stored as int16 scaled by 1e4 (1e-4 precision); masked pixels use the sentinel.
+INDEX_CACHE_SCALE = 10000.0
+INDEX_CACHE_NODATA = -32768
 
 # HLS products have 30 m ground sampling distance; used to convert pixels to area.
 HLS_PIXEL_RESOLUTION_METERS = 30.0
 HLS_PIXEL_AREA_SQM = HLS_PIXEL_RESOLUTION_METERS ** 2
+# HLS reflectance bands are int16 with -9999 as nodata; used when a COG does not declare one.
+HLS_NODATA = -9999
 # Treat NDVI >= 0.35 as photosynthetically active canopy (crop/biomass) coverage.
 CROP_NDVI_THRESHOLD = 0.35
 
+# Daily weather columns renamed for the NDVI + weather CSV export.
+_WEATHER_RENAME = {
+    'temperature_mean': 'temperature_deg_c',
+    'humidity_mean': 'humidity_pct',
+    'cloudcover_mean': 'cloudcover_pct',
+    'wind_speed_mean': 'wind_speed_mps',
+    'clarity_index': 'clarity_pct',
+}
+
 CROP_PROFILES = (
     {
         "name": "Potato",
@@ -191,36 +325,60 @@ CROP_PROFILES = (
     },
 )
 
+def _cache_key(value: str) -> str:
+    """Non-cryptographic 128-bit digest used to name local cache entries."""
+
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest()
+
+
 class IndexType(Enum):
     NDVI = 1
     EVI = 2
 
-def get_index_cache_path(index_type: IndexType, red_url: str, blue_url: str, nir_url: str, bbox: List[float]) -> Path:
-    payload = json.dumps(
-        {
+def get_index_cache_path(index_type: IndexType, red_url: str, blue_url: str, nir_url: str, bbox: List[float],
+                         scene_id: Optional[str] = None) -> Path:
+    rounded_bbox = [round(float(coord), 6) for coord in bbox]
+    if scene_id:
+        # HLS granules are immutable per id, so the key survives URL and token changes.
+        payload_obj = {"scene": scene_id, "bbox": rounded_bbox, "version": INDEX_CACHE_VERSION}
+    else:
+        payload_obj = {
             "red": red_url,
             "blue": blue_url,
             "nir": nir_url,
-            "bbox": [round(float(coord), 6) for coord in bbox],
+            "bbox": rounded_bbox,
             "version": INDEX_CACHE_VERSION
-        },
-        sort_keys=True
-    )
+        }
+    payload = json.dumps(payload_obj, sort_keys=True)
     cache_dir = CACHE_ROOT / index_type.name
     cache_dir.mkdir(parents=True, exist_ok=True)
-    key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    key = _cache_key(payload)
     return cache_dir / f"{key}.npz"
 
+def clear_index_cache() -> None:
+    """Drop every cached NDVI/EVI window; the next search re-reads the bands."""
+
+    for index_type in IndexType:
+        shutil.rmtree(CACHE_ROOT / index_type.name, ignore_errors=True)
+
 STAC_CACHE_DIR = CACHE_ROOT / "stac"
-STAC_CACHE_VERSION = "1"
+STAC_CACHE_VERSION = "3"
 
 STAC_PAGE_SIZE = 200
 STAC_MAX_ITEMS = 2000
 _STAC_MEMORY_CACHE_MAX_ENTRIES = 32
-_STAC_RESULTS_CACHE: "OrderedDict[Tuple[Any, ...], Tuple[Dict[str, Any], ...]]" = OrderedDict()
+_STAC_RESULTS_CACHE: "OrderedDict[Tuple[Any, ...], Tuple[Tuple[Any, ...], ...]]" = OrderedDict()
+# Request threads and the background refresh thread both touch the LRU above.
+_STAC_RESULTS_LOCK = threading.Lock()
 
 
 STAC_CACHE_TTL_SECONDS = 3600 * 24 * 7
+# Entries older than the TTL but younger than this are served while a background refresh runs.
+STAC_CACHE_STALE_SECONDS = 3600 * 24 * 30
+
+_STAC_REFRESH_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="stac-refresh")
+_STAC_REFRESH_LOCK = threading.Lock()
+_STAC_REFRESH_INFLIGHT: set = set()
 
 def get_stac_cache_path(bbox: List[float], start: str, end: str, max_cc: int,
                         dataset_type: str, token: str) -> Path:
@@ -230,32 +388,68 @@ def get_stac_cache_path(bbox: List[float], start: str, end: str, max_cc: int,
         "end": end,
         "max_cc": int(max_cc),
         "dataset": dataset_type,
-        "token": hashlib.sha256(token.encode("utf-8")).hexdigest() if token else "",
+        "token": _cache_key(token) if token else "",
         "version": STAC_CACHE_VERSION
     }
     cache_dir = STAC_CACHE_DIR
     cache_dir.mkdir(parents=True, exist_ok=True)
-    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
-    return cache_dir / f"{key}.json"
+    key = _cache_key(json.dumps(payload, sort_keys=True))
+    return cache_dir / f"{key}.parquet"
+
+_STAC_COLUMNS = ("id", "datetime", "cloud_cover", "collection", "nir_url", "red_url", "blue_url")
+# Parquet schema metadata key holding the search bbox alongside the cached records.
+_STAC_CACHE_BBOX_KEY = b"chipnik_bbox"
+
+
+def _stac_records_frame(records: List[Tuple[Any, ...]]) -> pd.DataFrame:
+    """Build the typed, datetime-sorted scene frame from STAC record tuples."""
+
+    columns = dict(zip(_STAC_COLUMNS, zip(*records))) if records else {name: () for name in _STAC_COLUMNS}
+    df = pd.DataFrame({
+        "id": list(columns["id"]),
+        # One vectorised parse for all timestamps instead of one per item.
+        "datetime": pd.to_datetime(list(columns["datetime"]), utc=True, format="ISO8601"),
+        "cloud_cover": np.asarray(columns["cloud_cover"], dtype=np.float32),
+        "collection": pd.Categorical(columns["collection"]),
+        "nir_url": list(columns["nir_url"]),
+        "red_url": list(columns["red_url"]),
+        "blue_url": list(columns["blue_url"]),
+    })
+    return df.sort_values("datetime", kind="mergesort").reset_index(drop=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _read_stac_cache_file(cache_path: str, mtime_ns: int) -> pd.DataFrame:
+    """Parquet read memoised per file version; a refresh rewrites the file and so changes mtime_ns."""
+
+    return pd.read_parquet(cache_path)
+
 
 def load_stac_cache(cache_path: Path) -> Optional[pd.DataFrame]:
-    if not cache_path.exists():
-        return None
+    stale = False
     try:
+        # One stat serves as both the existence check and the age check.
+        mtime_ns = os.stat(cache_path).st_mtime_ns
         if STAC_CACHE_TTL_SECONDS > 0:
-            age = time.time() - cache_path.stat().st_mtime
-            if age > STAC_CACHE_TTL_SECONDS:
+            age = (time.time_ns() - mtime_ns) / 1e9
+            if age > max(STAC_CACHE_STALE_SECONDS, STAC_CACHE_TTL_SECONDS):
                 try:
                     cache_path.unlink()
                 except FileNotFoundError:
                     pass
                 return None
+            stale = age > STAC_CACHE_TTL_SECONDS
+    except FileNotFoundError:
+        return None
     except OSError:
         logger.exception("Failed to inspect STAC cache at %s", cache_path)
         return None
 
     try:
-        raw = json.loads(cache_path.read_text(encoding="utf-8"))
+        # Stored typed and already sorted by datetime, so no re-parsing is needed.
+        df = _read_stac_cache_file(str(cache_path), mtime_ns)
+        df.attrs["stale"] = stale
+        return df
     except Exception:
         logger.exception("Failed to read STAC cache from %s", cache_path)
         try:
@@ -264,48 +458,21 @@ def load_stac_cache(cache_path: Path) -> Optional[pd.DataFrame]:
             pass
         return None
 
-    records = raw.get("records", [])
-    if not records:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(records)
-    if "datetime" in df.columns:
-        df["datetime"] = pd.to_datetime(df["datetime"])
-        df = df.sort_values("datetime")
-    return df
-
-def store_stac_cache(cache_path: Path, records: List[dict], bbox: List[float]) -> None:
+def store_stac_cache(cache_path: Path, df: pd.DataFrame, bbox: List[float]) -> None:
+    # Written beside the target and swapped in atomically, so readers never see a half-written file.
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
     try:
-        serialisable: List[dict] = []
-        for record in records:
-            cloud_cover = record.get("cloud_cover")
-            if cloud_cover is not None:
-                try:
-                    cloud_cover = float(cloud_cover)
-                except (TypeError, ValueError):
-                    cloud_cover = None
-
-            dt_value = record.get("datetime")
-            if isinstance(dt_value, (datetime, pd.Timestamp)):
-                dt_serialised = dt_value.isoformat()
-            elif dt_value is not None:
-                dt_serialised = str(dt_value)
-            else:
-                dt_serialised = None
-
-            serialisable.append({
-                "id": record.get("id"),
-                "datetime": dt_serialised,
-                "cloud_cover": cloud_cover,
-                "collection": record.get("collection"),
-                "nir_url": record.get("nir_url"),
-                "red_url": record.get("red_url"),
-                "blue_url": record.get("blue_url"),
-            })
-
-        cache_path.write_text(json.dumps({"records": serialisable, "bbox": bbox}), encoding="utf-8")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_STAC_CACHE_BBOX_KEY] = json.dumps(bbox).encode("utf-8")
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path, compression="zstd")
+        os.replace(tmp_path, cache_path)
     except Exception:
         logger.exception("Failed to persist STAC cache at %s", cache_path)
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
 
 def list_stac_cache_files() -> List[Path]:
     """
@@ -318,7 +485,7 @@ def list_stac_cache_files() -> List[Path]:
     if not stac_cache_dir.exists():
         return []
     
-    return list(stac_cache_dir.glob("*.json"))
+    return list(stac_cache_dir.glob("*.parquet"))
 
 def load_cached_data_with_region(cache_file_path: Path) -> Tuple[pd.DataFrame, Optional[dict], Optional[List[float]]]:
     """
@@ -340,9 +507,10 @@ def load_cached_data_with_region(cache_file_path: Path) -> Tuple[pd.DataFrame, O
         if cached_df is None or cached_df.empty:
             return pd.DataFrame(), None, None
         
-        # Load raw JSON to get bbox
-        raw_data = json.loads(cache_file_path.read_text(encoding="utf-8"))
-        bbox = raw_data.get("bbox")
+        # The bbox is kept in the Parquet schema metadata
+        schema_metadata = pq.read_schema(cache_file_path).metadata or {}
+        raw_bbox = schema_metadata.get(_STAC_CACHE_BBOX_KEY)
+        bbox = json.loads(raw_bbox) if raw_bbox else None
         
         if not bbox or len(bbox) != 4:
             logger.warning("No valid bbox found in cache file %s", cache_file_path)
@@ -387,22 +555,7 @@ def load_cached_data_with_region(cache_file_path: Path) -> Tuple[pd.DataFrame, O
         return pd.DataFrame(), None, None
 
 def load_token_from_env() -> str:
-    token = os.getenv("EARTHDATA_BEARER_TOKEN")
-    if token:
-        return token.strip()
-
-    env_path = Path(".env")
-    if env_path.exists():
-        for line in env_path.read_text(encoding="utf-8").splitlines():
-            stripped = line.strip()
-            if not stripped or stripped.startswith("#"):
-                continue
-            if stripped.startswith("EARTHDATA_BEARER_TOKEN"):
-                _, _, value = stripped.partition("=")
-                token = value.strip().strip('"').strip("'")
-                os.environ["EARTHDATA_BEARER_TOKEN"] = token
-                return token
-    return ""
+    return (os.getenv("EARTHDATA_BEARER_TOKEN") or "").strip()
 
 def normalize_bbox(bbox: List[float]) -> List[float]:
     if not bbox or len(bbox) != 4:
@@ -430,6 +583,16 @@ def ensure_datetime(value: Union[datetime, date]) -> datetime:
         return value
     return datetime.combine(value, datetime.min.time())
 
+
+@st.cache_data(show_spinner=False)
+def _bbox_summary(bbox: Tuple[float, float, float, float]) -> Dict[str, Any]:
+    """Centre (lat, lon) and approximate area (~111 km per degree) of a WGS84 bbox."""
+
+    return {
+        'center': ((bbox[1] + bbox[3]) / 2, (bbox[0] + bbox[2]) / 2),
+        'area_km2': (bbox[2] - bbox[0]) * 111 * (bbox[3] - bbox[1]) * 111,
+    }
+
 # Page configuration
 st.set_page_config(
     page_title=f"{APP_NAME} - HLS Analytics",
@@ -545,8 +708,7 @@ with st.sidebar:
             st.caption(f"Loaded from `geojsons/{selected_geojson_path.name}`")
         if geojson_input:
             try:
-                geojson_data = json.loads(geojson_input)
-                geom = extract_geometry_from_geojson(geojson_data)
+                geom = extract_geometry_from_geojson(geojson_input)
                 aoi_geometry = geom
                 raw_bbox = list(geom.bounds)
                 bbox = normalize_bbox(raw_bbox)
@@ -610,6 +772,10 @@ with st.sidebar:
 
     search_button = st.button("Search scenes", type="primary", use_container_width=True)
 
+    if st.button("Clear NDVI cache", use_container_width=True):
+        clear_index_cache()
+        st.success("NDVI cache cleared")
+
 if bbox:
     logger.debug("Active bbox for queries: %s", bbox)
 
@@ -730,7 +896,7 @@ def build_yearly_crop_rankings(ndvi_df: pd.DataFrame, crop_df: pd.DataFrame) ->
 def _stac_token_fingerprint(token: str) -> str:
     if not token:
         return "anon"
-    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+    return _cache_key(token)
 
 
 def _make_stac_memory_cache_key(
@@ -745,19 +911,55 @@ def _make_stac_memory_cache_key(
     return (rounded_bbox, start, end, int(max_cc), dataset_type, _stac_token_fingerprint(token))
 
 
-def _get_stac_records_from_memory(cache_key: Tuple[Any, ...]) -> Optional[List[Dict[str, Any]]]:
-    cached = _STAC_RESULTS_CACHE.get(cache_key)
-    if cached is None:
+def _get_stac_records_from_memory(cache_key: Tuple[Any, ...]) -> Optional[List[Tuple[Any, ...]]]:
+    with _STAC_RESULTS_LOCK:
+        cached = _STAC_RESULTS_CACHE.get(cache_key)
+        if cached is None:
+            return None
+        _STAC_RESULTS_CACHE.move_to_end(cache_key)
+    return list(cached)
+
+
+def _set_stac_records_in_memory(cache_key: Tuple[Any, ...], records: List[Tuple[Any, ...]]) -> None:
+    with _STAC_RESULTS_LOCK:
+        _STAC_RESULTS_CACHE[cache_key] = tuple(records)
+        _STAC_RESULTS_CACHE.move_to_end(cache_key)
+        if len(_STAC_RESULTS_CACHE) > _STAC_MEMORY_CACHE_MAX_ENTRIES:
+            _STAC_RESULTS_CACHE.popitem(last=False)
+
+
+def _stac_record_from_item(item: Dict[str, Any], max_cc: int) -> Optional[Tuple[Any, ...]]:
+    """Turn a raw STAC item dict into a scene record in _STAC_COLUMNS order, or None when it fails the filters."""
+
+    item_id = item.get("id")
+    props = item.get("properties") or {}
+    assets = item.get("assets") or {}
+    cloud_cover = props.get("eo:cloud_cover", 100)
+    if cloud_cover > max_cc:
+        logger.debug(
+            "Skipping item %s: cloud cover %.2f exceeds threshold %s",
+            item_id,
+            cloud_cover,
+            max_cc,
+        )
         return None
-    _STAC_RESULTS_CACHE.move_to_end(cache_key)
-    return [dict(record) for record in cached]
 
+    nir_url = (assets.get("B8A") or assets.get("B05") or {}).get("href")
+    red_url = (assets.get("B04") or {}).get("href")
+    blue_url = (assets.get("B02") or {}).get("href")
+    if not nir_url or not red_url or not blue_url:
+        logger.debug(
+            "Skipping item %s: missing required bands (red=%s, nir=%s, blue=%s)",
+            item_id,
+            bool(red_url),
+            bool(nir_url),
+            bool(blue_url),
+        )
+        return None
 
-def _set_stac_records_in_memory(cache_key: Tuple[Any, ...], records: List[Dict[str, Any]]) -> None:
-    _STAC_RESULTS_CACHE[cache_key] = tuple(dict(record) for record in records)
-    _STAC_RESULTS_CACHE.move_to_end(cache_key)
-    if len(_STAC_RESULTS_CACHE) > _STAC_MEMORY_CACHE_MAX_ENTRIES:
-        _STAC_RESULTS_CACHE.popitem(last=False)
+    logger.debug("Kept item %s (collection=%s)", item_id, item.get("collection"))
+    # The datetime string is parsed later for the whole result set at once.
+    return (item_id, props["datetime"], cloud_cover, item.get("collection"), nir_url, red_url, blue_url)
 
 
 def _fetch_stac_records(
@@ -767,7 +969,7 @@ def _fetch_stac_records(
     max_cc: int,
     dataset_type: str,
     token: str,
-) -> List[Dict[str, Any]]:
+) -> List[Tuple[Any, ...]]:
     cache_key = _make_stac_memory_cache_key(bbox, start, end, max_cc, dataset_type, token)
     cached_records = _get_stac_records_from_memory(cache_key)
     if cached_records is not None:
@@ -802,7 +1004,7 @@ def _fetch_stac_records(
 
     logger.debug("Collections to query: %s", collections)
 
-    records: List[Dict[str, Any]] = []
+    records: List[Tuple[Any, ...]] = []
     normalised_bbox = list(bbox)
 
     for collection in collections:
@@ -813,67 +1015,60 @@ def _fetch_stac_records(
             max_items=STAC_MAX_ITEMS,
             limit=STAC_PAGE_SIZE,
         )
-        collected: List[Any] = []
-        for item in search.items():
-            collected.append(item)
-            if len(collected) >= STAC_MAX_ITEMS:
+        # Raw item dicts skip pystac.Item construction; filtering happens as pages stream in.
+        seen = 0
+        for item in search.items_as_dicts():
+            seen += 1
+            record = _stac_record_from_item(item, max_cc)
+            if record is not None:
+                records.append(record)
+            if seen >= STAC_MAX_ITEMS:
                 logger.warning(
                     "Reached STAC max items (%s) for %s; results truncated",
                     STAC_MAX_ITEMS,
                     collection,
                 )
                 break
-        logger.debug("Collection %s returned %s items before filtering", collection, len(collected))
-
-        for item in collected:
-            props = item.properties
-            cloud_cover = props.get("eo:cloud_cover", 100)
-            if cloud_cover > max_cc:
-                logger.debug(
-                    "Skipping item %s: cloud cover %.2f exceeds threshold %s",
-                    item.id,
-                    cloud_cover,
-                    max_cc,
-                )
-                continue
-
-            nir_asset = item.assets.get("B8A") or item.assets.get("B05")
-            red_asset = item.assets.get("B04")
-            blue_asset = item.assets.get("B02")
-
-            nir_url = getattr(nir_asset, "href", None)
-            red_url = getattr(red_asset, "href", None)
-            blue_url = getattr(blue_asset, "href", None)
-            if not nir_url or not red_url or not blue_url:
-                logger.debug(
-                    "Skipping item %s: missing required bands (red=%s, nir=%s, blue=%s)",
-                    item.id,
-                    bool(red_url),
-                    bool(nir_url),
-                    bool(blue_url),
-                )
-                continue
-
-            records.append(
-                {
-                    "id": item.id,
-                    "datetime": pd.to_datetime(props["datetime"]),
-                    "cloud_cover": float(cloud_cover),
-                    "collection": item.collection_id,
-                    "nir_url": nir_url,
-                    "red_url": red_url,
-                    "blue_url": blue_url,
-                }
-            )
-            logger.debug("Kept item %s (collection=%s)", item.id, item.collection_id)
+        logger.debug("Collection %s returned %s items before filtering", collection, seen)
 
     _set_stac_records_in_memory(cache_key, records)
     return records
 
-@st.cache_data(ttl=3600 * 24 * 7)
+def _refresh_stac_cache(cache_path: Path, bbox: List[float], start: str, end: str,
+                       max_cc: int, dataset_type: str, token: str) -> None:
+    try:
+        memory_key = _make_stac_memory_cache_key(tuple(bbox), start, end, max_cc, dataset_type, token)
+        with _STAC_RESULTS_LOCK:
+            _STAC_RESULTS_CACHE.pop(memory_key, None)
+        records = _fetch_stac_records(tuple(bbox), start, end, max_cc, dataset_type, token)
+        # The new file gets a new mtime, so only this entry's memoised read is superseded.
+        store_stac_cache(cache_path, _stac_records_frame(records), bbox)
+        logger.debug("Refreshed stale STAC cache %s with %s items", cache_path.name, len(records))
+    except Exception:
+        logger.exception("Background STAC refresh failed for %s", cache_path.name)
+    finally:
+        with _STAC_REFRESH_LOCK:
+            _STAC_REFRESH_INFLIGHT.discard(cache_path)
+
+
+def _schedule_stac_refresh(cache_path: Path, bbox: List[float], start: str, end: str,
+                           max_cc: int, dataset_type: str, token: str) -> None:
+    with _STAC_REFRESH_LOCK:
+        if cache_path in _STAC_REFRESH_INFLIGHT:
+            return
+        _STAC_REFRESH_INFLIGHT.add(cache_path)
+    _STAC_REFRESH_EXECUTOR.submit(
+        _refresh_stac_cache, cache_path, list(bbox), start, end, max_cc, dataset_type, token
+    )
+
+
 def search_hls_data(bbox: List[float], start: str, end: str, max_cc: int,
                     dataset_type: str, _token: str) -> pd.DataFrame:
-    """Search HLS scenes via the STAC API"""
+    """Search HLS scenes via the STAC API.
+
+    Not memoised itself: reruns hit the mtime-keyed Parquet read in load_stac_cache, so a stale
+    entry is replaced as soon as its background refresh lands without touching other searches.
+    """
 
     logger.info("search_hls_data: bbox=%s start=%s end=%s max_cc=%s dataset=%s token_provided=%s", bbox, start, end, max_cc, dataset_type, bool(_token))
     bbox = normalize_bbox(bbox)
@@ -881,6 +1076,9 @@ def search_hls_data(bbox: List[float], start: str, end: str, max_cc: int,
     cache_path = get_stac_cache_path(bbox, start, end, max_cc, dataset_type, _token)
     cached_df = load_stac_cache(cache_path)
     if cached_df is not None:
+        if cached_df.attrs.get("stale"):
+            # Serve the stale scenes now and refresh the cache file in the background.
+            _schedule_stac_refresh(cache_path, bbox, start, end, max_cc, dataset_type, _token)
         logger.debug("search_hls_data: returning %s cached items from %s", len(cached_df), cache_path.name)
         return cached_df
 
@@ -891,11 +1089,9 @@ def search_hls_data(bbox: List[float], start: str, end: str, max_cc: int,
         st.error(f"Search error: {e}")
         return pd.DataFrame()
 
-    df = pd.DataFrame(records)
+    df = _stac_records_frame(records)
     logger.info("search_hls_data: %s items after filtering", len(df))
-    if not df.empty:
-        df = df.sort_values("datetime")
-    store_stac_cache(cache_path, records, bbox)
+    store_stac_cache(cache_path, df, bbox)
     logger.debug("search_hls_data: cached %s items at %s", len(df), cache_path.name)
     return df
 
@@ -937,9 +1133,253 @@ def summarise_ndvi_stats(ndvi: Optional[np.ma.MaskedArray], mean_ndvi: float) ->
     }
 
 
+# GDAL options applied to every HLS band read.
+_GDAL_ENV_OPTIONS: Dict[str, str] = {
+    'GDAL_NUM_THREADS': 'ALL_CPUS',
+    'CPL_VSIL_CURL_ALLOWED_EXTENSIONS': '.tif,.tiff',
+    # HLS assets carry no sidecar files, so skip the directory listing GDAL does on open.
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    'GDAL_HTTP_MERGE_CONSECUTIVE_RANGES': 'YES',
+    'GDAL_HTTP_MAX_RETRY': '3',
+    'VSI_CACHE': 'TRUE',
+    'VSI_CACHE_SIZE': '100000000',
+}
+
+
+@lru_cache(maxsize=64)
+def _wgs84_to_crs(crs_wkt: str) -> Transformer:
+    """Long-lived WGS84 -> raster CRS transformer; HLS searches only touch a handful of UTM zones."""
+
+    return Transformer.from_crs("EPSG:4326", crs_wkt, always_xy=True)
+
+
+@lru_cache(maxsize=128)
+def _reproj_bbox(crs_wkt: str, bbox: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
+    """Project a WGS84 bbox into the raster CRS; cached since every scene of a search reuses the AOI."""
+
+    # Full densification: AOIs straddling the zone's central meridian bow outward mid-edge.
+    return _wgs84_to_crs(crs_wkt).transform_bounds(
+        bbox[0],
+        bbox[1],
+        bbox[2],
+        bbox[3],
+        densify_pts=21
+    )
+
+
+def _window_from_bbox(src_obj: rasterio.io.DatasetReader, bbox: List[float]):
+    try:
+        left, bottom, right, top = _reproj_bbox(src_obj.crs.to_wkt(), tuple(bbox))
+    except Exception:
+        logger.exception("Failed to transform AOI %s into %s", bbox, src_obj.crs)
+        raise
+
+    left = max(left, src_obj.bounds.left)
+    right = min(right, src_obj.bounds.right)
+    bottom = max(bottom, src_obj.bounds.bottom)
+    top = min(top, src_obj.bounds.top)
+
+    if not (left < right and bottom < top):
+        logger.warning(
+            "AOI %s does not intersect raster bounds %s for %s",
+            bbox,
+            src_obj.bounds,
+            src_obj.name
+        )
+        return None
+
+    window = src_obj.window(left, bottom, right, top)
+    window = window.round_offsets(op=math.floor).round_shape(op=math.ceil)
+
+    if window.width <= 0 or window.height <= 0:
+        logger.warning(
+            "AOI %s produced empty window against raster %s",
+            bbox,
+            src_obj.name
+        )
+        return None
+
+    return window
+
+
+def _block_aligned_window(src_obj: rasterio.io.DatasetReader, window: Window) -> Window:
+    """Grow a window outward to whole internal COG blocks, clipped to the raster extent."""
+
+    block_height, block_width = src_obj.block_shapes[0]
+    col_off = (int(window.col_off) // block_width) * block_width
+    row_off = (int(window.row_off) // block_height) * block_height
+    col_end = min(math.ceil((window.col_off + window.width) / block_width) * block_width, src_obj.width)
+    row_end = min(math.ceil((window.row_off + window.height) / block_height) * block_height, src_obj.height)
+    return Window(col_off, row_off, col_end - col_off, row_end - row_off)
+
+
+_SCRATCH_POOL: Dict[Tuple[Tuple[int, ...], str], List[np.ndarray]] = {}
+_SCRATCH_POOL_LOCK = threading.Lock()
+_SCRATCH_POOL_MAX_PER_SHAPE = 16
+# Upper bound on idle buffer memory; buffers that would exceed it are left to the allocator.
+_SCRATCH_POOL_MAX_BYTES = 64 * 1024 * 1024
+_scratch_pool_bytes = 0
+
+
+def _acquire_scratch(shape: Tuple[int, ...], dtype: Any) -> np.ndarray:
+    """Hand out a free buffer of the given shape/dtype; scenes of one AOI share a window shape."""
+
+    global _scratch_pool_bytes
+    key = (tuple(shape), np.dtype(dtype).str)
+    with _SCRATCH_POOL_LOCK:
+        free = _SCRATCH_POOL.get(key)
+        if free:
+            array = free.pop()
+            _scratch_pool_bytes -= array.nbytes
+            return array
+    return np.empty(shape, dtype=dtype)
+
+
+def _release_scratch(*arrays: np.ndarray) -> None:
+    global _scratch_pool_bytes
+    with _SCRATCH_POOL_LOCK:
+        for array in arrays:
+            # Views handed out by _read_band go back to the pool as their full buffer.
+            if array.base is not None:
+                array = array.base
+            if _scratch_pool_bytes + array.nbytes > _SCRATCH_POOL_MAX_BYTES:
+                continue
+            free = _SCRATCH_POOL.setdefault((array.shape, array.dtype.str), [])
+            if len(free) < _SCRATCH_POOL_MAX_PER_SHAPE:
+                free.append(array)
+                _scratch_pool_bytes += array.nbytes
+
+
+def clear_scratch_pool() -> None:
+    """Drop all idle band buffers; called when a batch of scenes is finished."""
+
+    global _scratch_pool_bytes
+    with _SCRATCH_POOL_LOCK:
+        _SCRATCH_POOL.clear()
+        _scratch_pool_bytes = 0
+
+
+def _read_band(url: str, bbox: List[float], env_kwargs: Dict[str, object]) -> Optional[Tuple[np.ndarray, float]]:
+    """Read the AOI window of a single-band COG in its native dtype.
+
+    Returns the raw pixels with the band's nodata value, or None when the AOI misses the raster.
+    The pixel buffer comes from the scratch pool and must be handed back via _release_scratch.
+    """
+
+    with rasterio.Env(**env_kwargs):
+        logger.debug("Opening band %s", url)
+        with rasterio.open(url) as src:
+            window = _window_from_bbox(src, bbox)
+            if window is None:
+                return None
+            # Whole-block reads map onto single range requests; the AOI is sliced back out below.
+            block_window = _block_aligned_window(src, window)
+            block = _acquire_scratch((int(block_window.height), int(block_window.width)), src.dtypes[0])
+            # GDAL_NUM_THREADS already decodes the window's tiles in parallel.
+            src.read(1, window=block_window, out=block)
+            row_start = int(window.row_off - block_window.row_off)
+            col_start = int(window.col_off - block_window.col_off)
+            band = block[row_start:row_start + int(window.height), col_start:col_start + int(window.width)]
+            nodata = src.nodata if src.nodata is not None else HLS_NODATA
+            if np.issubdtype(band.dtype, np.integer) and float(nodata).is_integer():
+                # Same dtype as the pixels, so masking stays an integer compare with no promotion.
+                nodata = band.dtype.type(nodata)
+            logger.debug("Read band %s with shape %s", url, getattr(band, 'shape', None))
+            return band, nodata
+
+
+if njit is not None:
+    # fastmath without 'nnan'/'ninf': the kernel writes NaN for masked pixels.
+    # Serial kernels: scenes already run on parallel worker threads, and parallel=True would
+    # oversubscribe the CPUs (and abort under Numba's non-thread-safe workqueue layer).
+    @njit(fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'}, cache=True, boundscheck=False)
+    def _ndvi_and_mean(red, nir, red_nodata, nir_nodata, out):
+        total = 0.0
+        count = 0
+        for i in range(red.shape[0]):
+            for j in range(red.shape[1]):
+                r = np.float32(red[i, j])
+                n = np.float32(nir[i, j])
+                denominator = n + r
+                if red[i, j] == red_nodata or nir[i, j] == nir_nodata or denominator == 0:
+                    out[i, j] = np.nan
+                else:
+                    value = (n - r) / denominator
+                    out[i, j] = value
+                    total += value
+                    count += 1
+        return total, count
+
+    @njit(fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'}, cache=True, boundscheck=False)
+    def _evi_and_mean(red, nir, blue, red_nodata, nir_nodata, blue_nodata, out):
+        total = 0.0
+        count = 0
+        for i in range(red.shape[0]):
+            for j in range(red.shape[1]):
+                r = np.float32(red[i, j])
+                n = np.float32(nir[i, j])
+                b = np.float32(blue[i, j])
+                denominator = n + np.float32(6.0) * r - np.float32(7.5) * b + np.float32(1.0)
+                if (red[i, j] == red_nodata or nir[i, j] == nir_nodata or blue[i, j] == blue_nodata
+                        or denominator == 0):
+                    out[i, j] = np.nan
+                else:
+                    value = np.float32(2.5) * (n - r) / denominator
+                    out[i, j] = value
+                    total += value
+                    count += 1
+        return total, count
+else:
+    _ndvi_and_mean = None
+    _evi_and_mean = None
+
+
+def _normalized_difference(nir: np.ndarray, red: np.ndarray) -> np.ndarray:
+    """NDVI in one fused pass; zero denominators yield NaN."""
+
+    if ne is not None:
+        return ne.evaluate(
+            "where(nir + red == 0, nan, (nir - red) / (nir + red))",
+            local_dict={"nir": nir, "red": red, "nan": np.float32(np.nan)},
+        )
+    # In-place fallback: two buffers instead of one temporary per operator.
+    ndvi = np.subtract(nir, red)
+    denominator = np.add(nir, red)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(ndvi, denominator, out=ndvi)
+    ndvi[denominator == 0] = np.nan
+    return ndvi
+
+
+def _enhanced_vegetation_index(nir: np.ndarray, red: np.ndarray, blue: np.ndarray) -> np.ndarray:
+    """EVI in one fused pass; zero denominators yield NaN, as in the numba kernel."""
+
+    if ne is not None:
+        return ne.evaluate(
+            "where(nir + 6 * red - 7.5 * blue + 1 == 0, nan, 2.5 * (nir - red) / (nir + 6 * red - 7.5 * blue + 1))",
+            local_dict={"nir": nir, "red": red, "blue": blue, "nan": np.float32(np.nan)},
+        )
+    denominator = np.multiply(red, np.float32(6.0))
+    denominator += nir
+    denominator += np.float32(1.0)
+    evi = np.multiply(blue, np.float32(7.5))
+    denominator -= evi
+    np.subtract(nir, red, out=evi)
+    evi *= np.float32(2.5)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(evi, denominator, out=evi)
+    evi[denominator == 0] = np.nan
+    return evi
+
+
 def calculate_index_from_urls(index_type: IndexType, red_url: str, blue_url: str, nir_url: str, bbox: List[float],
-                             token: str) -> Tuple[Optional[np.ma.MaskedArray], Optional[float], Optional[Dict[str, float]]]:
-    """Compute vegetation index from COG assets and derive NDVI statistics when applicable."""
+                             token: str, scene_id: Optional[str] = None,
+                             band_cache: Optional[Dict[str, Any]] = None) -> Tuple[Optional[np.ma.MaskedArray], Optional[float], Optional[Dict[str, float]]]:
+    """Compute vegetation index from COG assets and derive NDVI statistics when applicable.
+
+    When ``band_cache`` is given, band reads are shared through it and its buffers are
+    left for the caller to release; otherwise they are recycled before returning.
+    """
 
     logger.info(
         "calculate_index_from_urls: red_url=%s blue_url=%s nir_url=%s bbox=%s token_provided=%s",
@@ -957,14 +1397,16 @@ def calculate_index_from_urls(index_type: IndexType, red_url: str, blue_url: str
         st.warning("Vegetation index calculation error: invalid bounding box")
         return None, None, None
 
-    cache_path = get_index_cache_path(index_type, red_url, blue_url, nir_url, bbox)
+    cache_path = get_index_cache_path(index_type, red_url, blue_url, nir_url, bbox, scene_id=scene_id)
 
     if cache_path.exists():
         try:
             with np.load(cache_path, allow_pickle=False) as cached:
-                index_data = cached[index_type.name]
-                mask = cached['mask']
+                quantized = cached[index_type.name]
                 mean_index = float(cached['mean'].item())
+            mask = quantized == INDEX_CACHE_NODATA
+            index_data = quantized.astype('float32')
+            index_data /= INDEX_CACHE_SCALE
             masked_data = np.ma.array(index_data, mask=mask)
             stats = summarise_ndvi_stats(masked_data, mean_index) if index_type is IndexType.NDVI else None
             logger.debug("Loaded index data from cache for %s", cache_path.name)
@@ -976,12 +1418,12 @@ def calculate_index_from_urls(index_type: IndexType, red_url: str, blue_url: str
             except FileNotFoundError:
                 pass
 
+    scratch: List[np.ndarray] = []
     try:
-        env_kwargs: dict[str, object] = {}
+        env_kwargs: dict[str, object] = dict(_GDAL_ENV_OPTIONS)
         session = None
         if token:
             env_kwargs['GDAL_HTTP_HEADERS'] = f"Authorization: Bearer {token}"
-            env_kwargs['GDAL_DISABLE_READDIR_ON_OPEN'] = 'EMPTY_DIR'
             env_kwargs['GDAL_HTTP_MULTIRANGE'] = 'YES'
             logger.debug("Attempting to create AWSSession for provided NASA token")
             if AWSSession is not None:
@@ -1003,127 +1445,101 @@ def calculate_index_from_urls(index_type: IndexType, red_url: str, blue_url: str
         else:
             logger.debug("No NASA token supplied; using default rasterio session")
 
-        def _window_from_bbox(src_obj: rasterio.io.DatasetReader):
-            try:
-                left, bottom, right, top = transform_bounds(
-                    'EPSG:4326',
-                    src_obj.crs,
-                    bbox[0],
-                    bbox[1],
-                    bbox[2],
-                    bbox[3],
-                    densify_pts=21
-                )
-            except Exception:
-                logger.exception("Failed to transform AOI %s into %s", bbox, src_obj.crs)
-                raise
-
-            left = max(left, src_obj.bounds.left)
-            right = min(right, src_obj.bounds.right)
-            bottom = max(bottom, src_obj.bounds.bottom)
-            top = min(top, src_obj.bounds.top)
-
-            if not (left < right and bottom < top):
-                logger.warning(
-                    "AOI %s does not intersect raster bounds %s for %s",
-                    bbox,
-                    src_obj.bounds,
-                    src_obj.name
-                )
-                return None
-
-            window = src_obj.window(left, bottom, right, top)
-            window = window.round_offsets(op=math.floor).round_shape(op=math.ceil)
-
-            if window.width <= 0 or window.height <= 0:
-                logger.warning(
-                    "AOI %s produced empty window against raster %s",
-                    bbox,
-                    src_obj.name
-                )
-                return None
-
-            return window
-
-        with rasterio.Env(**env_kwargs):
-            logger.debug("Opening red band %s", red_url)
-            with rasterio.open(red_url) as red_src:
-                red_window = _window_from_bbox(red_src)
-                if red_window is None:
-                    return None, None, None
-                red = red_src.read(1, window=red_window, masked=True)
-                logger.debug("Read red band with shape %s", getattr(red, 'shape', None))
-
-            logger.debug("Opening blue band %s", blue_url)
-            with rasterio.open(blue_url) as blue_src:
-                blue_window = _window_from_bbox(blue_src)
-                if blue_window is None:
-                    return None, None, None
-                blue = blue_src.read(1, window=blue_window, masked=True)
-                logger.debug("Read blue band with shape %s", getattr(blue, 'shape', None))
-
-            logger.debug("Opening NIR band %s", nir_url)
-            with rasterio.open(nir_url) as nir_src:
-                nir_window = _window_from_bbox(nir_src)
-                if nir_window is None:
-                    return None, None, None
-                nir = nir_src.read(1, window=nir_window, masked=True)
-                logger.debug("Read NIR band with shape %s", getattr(nir, 'shape', None))
+        # Only EVI needs blue; bands another index of this scene already read are reused.
+        band_urls = {'red': red_url, 'nir': nir_url}
+        if index_type is IndexType.EVI:
+            band_urls['blue'] = blue_url
+        bands = band_cache if band_cache is not None else {}
+        missing = {name: url for name, url in band_urls.items() if name not in bands}
+        if missing:
+            # Each open costs a COG header round-trip, so the bands are fetched concurrently.
+            band_futures = {
+                name: _BAND_READ_EXECUTOR.submit(_read_band, url, bbox, env_kwargs)
+                for name, url in missing.items()
+            }
+            fetched = {name: future.result() for name, future in band_futures.items()}
+            bands.update(fetched)
+            if band_cache is None:
+                scratch.extend(band[0] for band in fetched.values() if band is not None)
+        if any(bands[name] is None for name in band_urls):
+            return None, None, None
+        red, red_nodata = bands['red']
+        nir, nir_nodata = bands['nir']
+        blue, blue_nodata = bands['blue'] if 'blue' in band_urls else (None, None)
 
         if red.size == 0 or nir.size == 0:
             logger.warning("AOI read returned empty arrays (red=%s, nir=%s)", red.size, nir.size)
             return None, None, None
 
-        if red.shape != nir.shape or red.shape != blue.shape:
+        if red.shape != nir.shape or (blue is not None and red.shape != blue.shape):
             logger.warning(
                 "Band windows differ in shape for %s vs %s vs %s: %s vs %s vs %s",
                 red_url,
                 blue_url,
                 nir_url,
                 red.shape,
-                blue.shape,
+                getattr(blue, 'shape', None),
                 nir.shape
             )
             return None, None, None
 
-        red_data = red.astype('float32')
-        blue_data = blue.astype('float32')
-        nir_data = nir.astype('float32')
-
-        match index_type:
-            case IndexType.NDVI:
-                with np.errstate(divide='ignore', invalid='ignore'):
-                    ndvi = (nir_data - red_data) / (nir_data + red_data)
-                combined_mask = np.ma.getmaskarray(red) | np.ma.getmaskarray(nir)
-                masked_data = np.ma.array(ndvi, mask=combined_mask)
-            case IndexType.EVI:
-                with np.errstate(divide='ignore', invalid='ignore'):
-                    evi = 2.5 * (nir_data - red_data) / (nir_data + 6 * red_data - 7.5 * blue_data + 1)
-                combined_mask = (
-                    np.ma.getmaskarray(red)
-                    | np.ma.getmaskarray(blue)
-                    | np.ma.getmaskarray(nir)
-                )
-                masked_data = np.ma.array(evi, mask=combined_mask)
-
-        if masked_data.count() == 0:
+        if index_type is IndexType.NDVI and _ndvi_and_mean is not None:
+            # Single fused pass over the raw bands: NDVI, nodata masking, sum and count together.
+            index_data = np.empty(red.shape, dtype=np.float32)
+            index_sum, valid_count = _ndvi_and_mean(red, nir, red_nodata, nir_nodata, index_data)
+            combined_mask = np.isnan(index_data)
+        elif index_type is IndexType.EVI and _evi_and_mean is not None:
+            index_data = np.empty(red.shape, dtype=np.float32)
+            index_sum, valid_count = _evi_and_mean(
+                red, nir, blue, red_nodata, nir_nodata, blue_nodata, index_data
+            )
+            combined_mask = np.isnan(index_data)
+        else:
+            red_data = _acquire_scratch(red.shape, np.float32)
+            nir_data = _acquire_scratch(nir.shape, np.float32)
+            scratch.extend((red_data, nir_data))
+            np.copyto(red_data, red)
+            np.copyto(nir_data, nir)
+            combined_mask = np.logical_or(red == red_nodata, nir == nir_nodata)
+
+            match index_type:
+                case IndexType.NDVI:
+                    index_data = _normalized_difference(nir_data, red_data)
+                    np.logical_or(combined_mask, np.isnan(index_data), out=combined_mask)
+                case IndexType.EVI:
+                    blue_data = _acquire_scratch(blue.shape, np.float32)
+                    scratch.append(blue_data)
+                    np.copyto(blue_data, blue)
+                    index_data = _enhanced_vegetation_index(nir_data, red_data, blue_data)
+                    np.logical_or(combined_mask, blue == blue_nodata, out=combined_mask)
+                    np.logical_or(combined_mask, np.isnan(index_data), out=combined_mask)
+
+            valid = np.logical_not(combined_mask)
+            valid_count = int(np.count_nonzero(valid))
+            index_sum = float(index_data.sum(where=valid, dtype=np.float64)) if valid_count else 0.0
+
+        if valid_count == 0:
             logger.warning("Vegetation index computation has no valid pixels for %s", red_url)
             return None, None, None
 
-        mean_index = float(masked_data.mean())
+        mean_index = float(index_sum / valid_count)
         logger.info("calculate_index_from_urls: mean index=%.4f", mean_index)
 
+        index_data[combined_mask] = np.nan
+        masked_data = np.ma.array(index_data, mask=combined_mask)
+
         stats = summarise_ndvi_stats(masked_data, mean_index) if index_type is IndexType.NDVI else None
 
         try:
-            index_data_to_store = masked_data.filled(np.nan).astype('float32')
-            mask_to_store = np.ma.getmaskarray(masked_data)
+            scaled = np.rint(masked_data.filled(0.0) * INDEX_CACHE_SCALE)
+            quantized = np.clip(scaled, -32767, 32767).astype(np.int16)
+            quantized[np.ma.getmaskarray(masked_data)] = INDEX_CACHE_NODATA
             data_to_save = {
-                index_type.name: index_data_to_store,
-                'mask': mask_to_store,
+                index_type.name: quantized,
                 'mean': np.array([mean_index], dtype='float32'),
             }
-            np.savez_compressed(cache_path, **data_to_save)
+            # Uncompressed: the int16 payload is already small and zlib dominated the write cost.
+            np.savez(cache_path, **data_to_save)
             logger.debug("Cached Vegetation index result at %s", cache_path)
         except Exception:
             logger.exception("Failed to persist Vegetation index cache at %s", cache_path)
@@ -1134,6 +1550,9 @@ def calculate_index_from_urls(index_type: IndexType, red_url: str, blue_url: str
         logger.exception("Vegetation index calculation failed")
         st.warning(f"Vegetation index calculation error: {e}")
         return None, None, None
+    finally:
+        # The returned index array is freshly allocated, so the band buffers can be recycled.
+        _release_scratch(*scratch)
 
 
 def compute_index_for_row(row: Tuple, index_types: List[IndexType], bbox: List[float], token: str) -> Dict[str, Any]:
@@ -1165,25 +1584,114 @@ def compute_index_for_row(row: Tuple, index_types: List[IndexType], bbox: List[f
         "collection": data.get("collection"),
     }
 
-    for index_type in index_types:
-        index_data, mean_index, stats = calculate_index_from_urls(index_type, red_url, blue_url, nir_url, bbox, token)
-        if index_data is None or mean_index is None:
-            continue
+    # Red and NIR windows read for NDVI are reused by EVI instead of being fetched again.
+    band_cache: Dict[str, Any] = {}
+    try:
+        for index_type in index_types:
+            index_data, mean_index, stats = calculate_index_from_urls(
+                index_type, red_url, blue_url, nir_url, bbox, token, scene_id=scene_id, band_cache=band_cache
+            )
+            # Only the scalar summaries are kept; drop the raster before the next index is computed.
+            has_index = index_data is not None
+            del index_data
+            if not has_index or mean_index is None:
+                continue
 
-        result[f"mean_{index_type.name}"] = mean_index
+            result[f"mean_{index_type.name}"] = mean_index
 
-        if index_type is IndexType.NDVI and stats:
-            result["crop_fraction"] = stats.get("crop_fraction")
-            result["crop_percent"] = stats.get("crop_percent")
-            result["crop_area_hectares"] = stats.get("crop_area_hectares")
-            result["total_area_hectares"] = stats.get("total_area_hectares")
+            if index_type is IndexType.NDVI and stats:
+                result["crop_fraction"] = stats.get("crop_fraction")
+                result["crop_percent"] = stats.get("crop_percent")
+                result["crop_area_hectares"] = stats.get("crop_area_hectares")
+                result["total_area_hectares"] = stats.get("total_area_hectares")
+    finally:
+        _release_scratch(*(band[0] for band in band_cache.values() if band is not None))
 
     return result
 
 
-def fetch_weather_history(lat: float, lon: float, start_date: datetime, end_date: datetime) -> pd.DataFrame:
-    start_str = start_date.strftime("%Y-%m-%d")
-    end_str = end_date.strftime("%Y-%m-%d")
+def resolve_worker_cap() -> int:
+    """Scene worker pool size: WORKER_CAP when set, otherwise 8 (1 on Cloud Run)."""
+
+    default_worker_cap = 1 if _CLOUD_RUN_SERVICE else 8
+    worker_cap_raw = os.getenv("WORKER_CAP", "").strip()
+    if not worker_cap_raw:
+        return default_worker_cap
+    try:
+        worker_cap = max(1, int(worker_cap_raw))
+    except ValueError:
+        logger.warning("Invalid WORKER_CAP=%s; falling back to default", worker_cap_raw)
+        return default_worker_cap
+    logger.info("WORKER_CAP=%s", worker_cap_raw)
+    return worker_cap
+
+
+# Long-lived so GDAL's per-thread vsicurl connections stay warm across bands, scenes and batches;
+# sized for every scene worker reading red, NIR and blue at once.
+_BAND_READ_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=3 * resolve_worker_cap(),
+    thread_name_prefix="band-read",
+)
+
+
+def compute_index_batch(rows: List[Any], index_types: List[IndexType], bbox: List[float], token: str,
+                        max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Compute vegetation indexes for many scenes concurrently.
+
+    Results are returned in input order; scenes that were skipped or failed yield an empty dict.
+    """
+
+    rows = list(rows)
+    if not rows:
+        return []
+
+    def _worker(row: Any) -> Dict[str, Any]:
+        try:
+            return compute_index_for_row(row, index_types=index_types, bbox=bbox, token=token)
+        except Exception:
+            logger.exception("NDVI worker failed for scene %s", getattr(row, "id", None))
+            return {}
+
+    pool_size = max(1, min(max_workers or resolve_worker_cap(), len(rows)))
+    logger.debug("NDVI worker pool size=%s", pool_size)
+    try:
+        if pool_size == 1:
+            return [_worker(row) for row in rows]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=pool_size) as executor:
+            return list(executor.map(_worker, rows))
+    finally:
+        clear_scratch_pool()
+
+
+def _float32_series(values: List[Any]) -> np.ndarray:
+    """Typed array from an Open-Meteo value list; missing readings (None) become NaN."""
+
+    return np.fromiter(
+        (np.nan if value is None else value for value in values),
+        dtype=np.float32,
+        count=len(values),
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_session() -> requests.Session:
+    """Process-wide HTTP session: pooled keep-alive connections and retries on gateway errors."""
+
+    session = requests.Session()
+    retries = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retries))
+    return session
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_weather_hourly(lat: float, lon: float, start_str: str, end_str: str) -> Dict[str, Any]:
+    """Hourly Open-Meteo archive payload; failures raise, so only successful responses are cached."""
+
     params = {
         "latitude": lat,
         "longitude": lon,
@@ -1192,20 +1700,25 @@ def fetch_weather_history(lat: float, lon: float, start_date: datetime, end_date
         "hourly": "temperature_2m,relative_humidity_2m,cloudcover,windspeed_10m",
         "timezone": "auto",
     }
+    response = get_http_session().get(
+        "https://archive-api.open-meteo.com/v1/archive",
+        params=params,
+        timeout=30,
+    )
+    response.raise_for_status()
+    return response.json().get("hourly") or {}
+
+
+def fetch_weather_history(lat: float, lon: float, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    start_str = start_date.strftime("%Y-%m-%d")
+    end_str = end_date.strftime("%Y-%m-%d")
     try:
-        response = requests.get(
-            "https://archive-api.open-meteo.com/v1/archive",
-            params=params,
-            timeout=30,
-        )
-        response.raise_for_status()
+        hourly = _fetch_weather_hourly(lat, lon, start_str, end_str)
     except Exception as exc:
         logger.exception("Weather API request failed")
         st.warning(f"Weather data unavailable: {exc}")
         return pd.DataFrame()
 
-    payload = response.json()
-    hourly = payload.get("hourly") or {}
     times = hourly.get("time")
     temps = hourly.get("temperature_2m")
     humidity = hourly.get("relative_humidity_2m")
@@ -1221,10 +1734,10 @@ def fetch_weather_history(lat: float, lon: float, start_date: datetime, end_date
     weather_df = pd.DataFrame(
         {
             "time": pd.to_datetime(times),
-            "temperature_c": pd.to_numeric(temps, errors="coerce"),
-            "humidity_pct": pd.to_numeric(humidity, errors="coerce"),
-            "cloudcover_pct": pd.to_numeric(cloudcover, errors="coerce"),
-            "wind_speed": pd.to_numeric(windspeed, errors="coerce"),
+            "temperature_c": _float32_series(temps),
+            "humidity_pct": _float32_series(humidity),
+            "cloudcover_pct": _float32_series(cloudcover),
+            "wind_speed": _float32_series(windspeed),
         }
     ).dropna()
 
@@ -1235,7 +1748,8 @@ def fetch_weather_history(lat: float, lon: float, start_date: datetime, end_date
         weather_df
         .set_index("time")
         .resample("D")
-        .mean()
+        .mean(numeric_only=True)
+        .astype(np.float32)
         .reset_index()
     )
     daily.rename(columns={
@@ -1245,11 +1759,65 @@ def fetch_weather_history(lat: float, lon: float, start_date: datetime, end_date
         "cloudcover_pct": "cloudcover_mean",
         "wind_speed": "wind_speed_mean",
     }, inplace=True)
-    daily["clarity_index"] = 100.0 - daily["cloudcover_mean"].clip(lower=0, upper=100)
+    daily["clarity_index"] = np.float32(100.0) - daily["cloudcover_mean"].clip(lower=0, upper=100)
     return daily
 
 
 
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_aoi_deck(aoi_wkb: Optional[bytes], bbox: Optional[Tuple[float, ...]], center_lat: float,
+                   center_lon: float, map_style: str) -> pdk.Deck:
+    """AOI map Deck, built once per distinct AOI/centre/style and shared across reruns and sessions."""
+
+    polygons = _aoi_polygons(aoi_wkb) if aoi_wkb else []
+    if not polygons and bbox:
+        polygons = [[
+            [bbox[0], bbox[1]],
+            [bbox[2], bbox[1]],
+            [bbox[2], bbox[3]],
+            [bbox[0], bbox[3]],
+            [bbox[0], bbox[1]],
+        ]]
+
+    layers = []
+    if polygons:
+        polygon_data = [{"polygon": poly} for poly in polygons]
+        layers.append(
+            pdk.Layer(
+                "PolygonLayer",
+                polygon_data,
+                get_polygon="polygon",
+                get_fill_color=[34, 139, 34, 80],
+                get_line_color=[34, 139, 34],
+                line_width_min_pixels=2,
+            )
+        )
+
+    layers.append(
+        pdk.Layer(
+            "ScatterplotLayer",
+            data=[{"position": [center_lon, center_lat]}],
+            get_position="position",
+            get_radius=750,
+            get_fill_color=[255, 215, 0, 180],
+            get_line_color=[0, 100, 0],
+            line_width_min_pixels=1,
+        )
+    )
+
+    return pdk.Deck(
+        map_style=map_style,
+        initial_view_state=pdk.ViewState(
+            latitude=center_lat,
+            longitude=center_lon,
+            zoom=9,
+            pitch=0,
+        ),
+        layers=layers,
+        tooltip={"text": "AOI"},
+    )
+
+
 def render_anomaly_section(anomalies_list: List[Dict[str, Any]], anomaly_charts: Dict[str, pd.DataFrame]) -> None:
     st.subheader("NDVI Anomalies")
 
@@ -1561,12 +2129,7 @@ def render_anomaly_section(anomalies_list: List[Dict[str, Any]], anomaly_charts:
 if search_button:
     if not earthdata_token:
         st.warning("Please set EARTHDATA_BEARER_TOKEN in your .env file.")
-        st.info("""
-        **How to obtain a token:**
-        1. Create an account at https://urs.earthdata.nasa.gov/
-        2. Open Profile -> Generate Token
-        3. Copy the Bearer Token into your .env file as EARTHDATA_BEARER_TOKEN
-        """)
+        st.info(_TOKEN_HELP_MD)
     elif not bbox:
         st.error(bbox_error or "Please provide an area of interest")
     else:
@@ -1577,8 +2140,7 @@ if search_button:
             center_latitude = centroid.y
             center_longitude = centroid.x
         elif bbox:
-            center_latitude = (bbox[1] + bbox[3]) / 2
-            center_longitude = (bbox[0] + bbox[2]) / 2
+            center_latitude, center_longitude = _bbox_summary(tuple(bbox))['center']
 
         start_dt = ensure_datetime(start_date)
         end_dt = ensure_datetime(end_date)
@@ -1608,79 +2170,73 @@ if search_button:
                 status_text = st.empty()
 
                 results: List[Dict[str, Any]] = []
-                row_tuples = list(df.itertuples(index=False))
+                # Plain dicts avoid building a namedtuple class; labels are formatted once, not per completion.
+                scene_rows = df.to_dict('records')
+                scene_total = len(scene_rows)
+                scene_labels = [
+                    f" ({scene_id}): {date_label}" if scene_id else f": {date_label}"
+                    for scene_id, date_label in zip(df['id'].tolist(), df['datetime'].dt.strftime('%Y-%m-%d').tolist())
+                ]
                 index_types = [IndexType.NDVI]
                 if ENABLE_EVI:
                     index_types.append(IndexType.EVI)
                 
-                if row_tuples:
+                if scene_rows:
                     worker = partial(compute_index_for_row, index_types=index_types, bbox=bbox, token=earthdata_token)
-                    default_worker_cap = 1 if _CLOUD_RUN_SERVICE else 8
-                    worker_cap_raw = os.getenv("WORKER_CAP", "").strip()
-                    if worker_cap_raw:
-                        try:
-                            worker_cap = max(1, int(worker_cap_raw))
-                            logger.info(f"WORKER_CAP={worker_cap_raw}")
-                        except ValueError:
-                            logger.warning("Invalid WORKER_CAP=%s; falling back to default", worker_cap_raw)
-                            worker_cap = default_worker_cap
-                    else:
-                        worker_cap = default_worker_cap
-                    max_workers = min(worker_cap, len(row_tuples))
+                    max_workers = min(resolve_worker_cap(), scene_total)
                     max_workers = max(1, max_workers)
                     logger.debug("NDVI worker pool size=%s", max_workers)
+                    # Scenes whose worker has not returned; only these are retried sequentially.
+                    pending_indices = set(range(scene_total))
                     try:
                         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                            future_to_index = {executor.submit(worker, row): idx for idx, row in enumerate(row_tuples)}
+                            future_to_index = {executor.submit(worker, row): idx for idx, row in enumerate(scene_rows)}
                             completed = 0
+                            last_ui_update = 0.0
                             for future in concurrent.futures.as_completed(future_to_index):
                                 idx = future_to_index[future]
                                 completed += 1
                                 try:
                                     result = future.result()
+                                    pending_indices.discard(idx)
                                     if result:
                                         results.append(result)
                                 except Exception:
                                     logger.exception("NDVI worker failed for index %s", idx)
-                                scene_info = df.iloc[idx]
-                                scene_id = scene_info.get('id') if hasattr(scene_info, 'get') else getattr(scene_info, 'id', None)
-                                date_value = scene_info.get('datetime') if hasattr(scene_info, 'get') else getattr(scene_info, 'datetime', None)
-                                date_label = date_value.strftime('%Y-%m-%d') if hasattr(date_value, 'strftime') else str(date_value)
-                                message = f"Processing scene {completed}/{len(row_tuples)}"
-                                if scene_id:
-                                    message += f" ({scene_id})"
-                                message += f": {date_label}"
-                                status_text.text(message)
-                                progress_bar.progress(completed / len(row_tuples))
+                                if completed % GC_EVERY_N_SCENES == 0:
+                                    gc.collect()
+                                message = f"Processing scene {completed}/{scene_total}{scene_labels[idx]}"
+                                now = time.monotonic()
+                                if now - last_ui_update >= PROGRESS_UPDATE_INTERVAL_SECONDS or completed == scene_total:
+                                    status_text.text(message)
+                                    progress_bar.progress(completed / scene_total)
+                                    last_ui_update = now
                                 log_progress(message)
                     except Exception:
                         logger.exception("Parallel NDVI processing failed; falling back to sequential execution")
-                        results = []
 
-                    if not results:
-                        logger.info("Parallel NDVI returned no results; retrying sequential execution")
+                    if pending_indices:
+                        retry_indices = sorted(pending_indices)
+                        logger.info("Retrying %s failed NDVI scenes sequentially", len(retry_indices))
                         progress_bar.progress(0.0)
-                        for idx, row in enumerate(row_tuples):
-                            scene_info = df.iloc[idx]
-                            scene_id = scene_info.get('id') if hasattr(scene_info, 'get') else getattr(scene_info, 'id', None)
-                            date_value = scene_info.get('datetime') if hasattr(scene_info, 'get') else getattr(scene_info, 'datetime', None)
-                            date_label = date_value.strftime('%Y-%m-%d') if hasattr(date_value, 'strftime') else str(date_value)
-                            message = f"Processing scene {idx + 1}/{len(row_tuples)}"
-                            if scene_id:
-                                message += f" ({scene_id})"
-                            message += f": {date_label}"
+                        for retry_number, idx in enumerate(retry_indices, start=1):
+                            message = f"Retrying scene {retry_number}/{len(retry_indices)}{scene_labels[idx]}"
                             status_text.text(message)
-                            result = worker(row)
-                            if result:
-                                results.append(result)
-                            progress_bar.progress((idx + 1) / len(row_tuples))
+                            try:
+                                result = worker(scene_rows[idx])
+                                if result:
+                                    results.append(result)
+                            except Exception:
+                                logger.exception("NDVI retry failed for index %s", idx)
+                            progress_bar.progress(retry_number / len(retry_indices))
                             log_progress(message)
 
+                clear_scratch_pool()
                 status_text.empty()
                 progress_bar.empty()
 
                 if results:
-                    ndvi_df = pd.DataFrame(results).sort_values('date')
+                    ndvi_df = pd.DataFrame(results).sort_values('date').reset_index(drop=True)
 
                     weather_df = pd.DataFrame()
                     if center_latitude is not None and center_longitude is not None:
@@ -1698,7 +2254,7 @@ if search_button:
 
                     fig = make_subplots(specs=[[{"secondary_y": True}]])
                     fig.add_trace(
-                        go.Scatter(
+                        go.Scattergl(
                             x=ndvi_df['date'],
                             y=ndvi_df['mean_NDVI'],
                             mode="lines+markers",
@@ -1712,7 +2268,7 @@ if search_button:
 
                     if ENABLE_EVI and 'mean_EVI' in ndvi_df:
                         fig.add_trace(
-                            go.Scatter(
+                            go.Scattergl(
                                 x=ndvi_df['date'],
                                 y=ndvi_df['mean_EVI'],
                                 mode="lines+markers",
@@ -1737,11 +2293,23 @@ if search_button:
                         annotation_text="Peak foliage target",
                     )
 
-                    if not weather_df.empty:
+                    weather_plot_df = weather_df
+                    weather_resolution = "daily"
+                    if not weather_df.empty and (end_dt - start_dt).days > 180:
+                        # Weekly means keep long ranges to a few hundred points per trace.
+                        weather_plot_df = (
+                            weather_df.set_index('date')
+                            .resample('W')
+                            .mean()
+                            .reset_index()
+                        )
+                        weather_resolution = "weekly"
+
+                    if not weather_plot_df.empty:
                         fig.add_trace(
-                            go.Scatter(
-                                x=weather_df['date'],
-                                y=weather_df['clarity_index'],
+                            go.Scattergl(
+                                x=weather_plot_df['date'],
+                                y=weather_plot_df['clarity_index'],
                                 name="Clarity index (%)",
                                 line=dict(color="#1b9e77"),
                                 visible='legendonly'
@@ -1749,27 +2317,27 @@ if search_button:
                             secondary_y=True,
                         )
                         fig.add_trace(
-                            go.Scatter(
-                                x=weather_df['date'],
-                                y=weather_df['humidity_mean'],
+                            go.Scattergl(
+                                x=weather_plot_df['date'],
+                                y=weather_plot_df['humidity_mean'],
                                 name="Humidity (%)",
                                 line=dict(color="#d95f02", dash="dash"),
                             ),
                             secondary_y=True,
                         )
                         fig.add_trace(
-                            go.Scatter(
-                                x=weather_df['date'],
-                                y=weather_df['temperature_mean'],
+                            go.Scattergl(
+                                x=weather_plot_df['date'],
+                                y=weather_plot_df['temperature_mean'],
                                 name="Temperature (deg C)",
                                 line=dict(color="#7570b3", dash="dot"),
                             ),
                             secondary_y=True,
                         )
                         fig.add_trace(
-                            go.Scatter(
-                                x=weather_df['date'],
-                                y=weather_df['wind_speed_mean'],
+                            go.Scattergl(
+                                x=weather_plot_df['date'],
+                                y=weather_plot_df['wind_speed_mean'],
                                 name="Wind speed (m/s)",
                                 line=dict(color="#66a61e", dash="dashdot"),
                                 visible='legendonly'
@@ -1788,8 +2356,8 @@ if search_button:
                     )
 
                     st.plotly_chart(fig, use_container_width=True)
-                    if not weather_df.empty:
-                        st.caption("Weather source: Open-Meteo archive (daily means).")
+                    if not weather_plot_df.empty:
+                        st.caption(f"Weather source: Open-Meteo archive ({weather_resolution} means).")
                     render_anomaly_section(anomalies_list, anomaly_charts)
 
                     col1, col2, col3, col4 = st.columns(4)
@@ -1890,7 +2458,16 @@ if search_button:
 
                         yearly_rankings = build_yearly_crop_rankings(ndvi_df, crop_df)
                         if not yearly_rankings.empty:
-                            area_source = yearly_rankings.sort_values('Estimated area (ha)', ascending=False)
+                            # Plot from a compact copy: float32 columns serialise to half-size typed arrays.
+                            rankings_plot = yearly_rankings.astype({
+                                'Estimated area (ha)': np.float32,
+                                'Estimated yield (t)': np.float32,
+                                'NDVI match': np.float32,
+                                'Year count': np.float32,
+                            })
+                            rankings_plot['Crop'] = rankings_plot['Crop'].astype('category')
+
+                            area_source = rankings_plot.sort_values('Estimated area (ha)', ascending=False)
                             area_fig = go.Figure()
                             area_fig.add_trace(
                                 go.Bar(
@@ -1918,7 +2495,7 @@ if search_button:
                             )
                             st.plotly_chart(area_fig, use_container_width=True)
 
-                            yield_source = yearly_rankings.sort_values('Estimated yield (t)', ascending=False)
+                            yield_source = rankings_plot.sort_values('Estimated yield (t)', ascending=False)
                             yield_fig = go.Figure()
                             yield_fig.add_trace(
                                 go.Bar(
@@ -1972,45 +2549,9 @@ if search_button:
             with tab2:
                 st.subheader("AOI map")
 
-                polygons = geometry_to_polygons(aoi_geometry) if aoi_geometry else []
-                if not polygons and bbox:
-                    polygons = [[
-                        [bbox[0], bbox[1]],
-                        [bbox[2], bbox[1]],
-                        [bbox[2], bbox[3]],
-                        [bbox[0], bbox[3]],
-                        [bbox[0], bbox[1]],
-                    ]]
-
                 map_center_lat = center_latitude if center_latitude is not None else DEFAULT_CENTER_LAT
                 map_center_lon = center_longitude if center_longitude is not None else DEFAULT_CENTER_LON
 
-                layers = []
-                if polygons:
-                    polygon_data = [{"polygon": poly} for poly in polygons]
-                    layers.append(
-                        pdk.Layer(
-                            "PolygonLayer",
-                            polygon_data,
-                            get_polygon="polygon",
-                            get_fill_color=[34, 139, 34, 80],
-                            get_line_color=[34, 139, 34],
-                            line_width_min_pixels=2,
-                        )
-                    )
-
-                layers.append(
-                    pdk.Layer(
-                        "ScatterplotLayer",
-                        data=[{"position": [map_center_lon, map_center_lat]}],
-                        get_position="position",
-                        get_radius=750,
-                        get_fill_color=[255, 215, 0, 180],
-                        get_line_color=[0, 100, 0],
-                        line_width_min_pixels=1,
-                    )
-                )
-
                 mapbox_token = os.getenv("MAPBOX_API_KEY")
                 if not mapbox_token and find_existing_secrets():
                     try:
@@ -2024,16 +2565,12 @@ if search_button:
                 else:
                     map_style = "https://basemaps.cartocdn.com/gl/positron-gl-style/style.json"
 
-                deck = pdk.Deck(
-                    map_style=map_style,
-                    initial_view_state=pdk.ViewState(
-                        latitude=map_center_lat,
-                        longitude=map_center_lon,
-                        zoom=9,
-                        pitch=0,
-                    ),
-                    layers=layers,
-                    tooltip={"text": "AOI"},
+                deck = build_aoi_deck(
+                    aoi_geometry.wkb if aoi_geometry is not None else None,
+                    tuple(bbox) if bbox else None,
+                    map_center_lat,
+                    map_center_lon,
+                    map_style,
                 )
                 st.pydeck_chart(deck)
 
@@ -2041,7 +2578,7 @@ if search_button:
                 **AOI summary:**
                 - South-west corner: {bbox[1]:.4f} deg N, {bbox[0]:.4f} deg E
                 - North-east corner: {bbox[3]:.4f} deg N, {bbox[2]:.4f} deg E
-                - Approximate area: ~{((bbox[2] - bbox[0]) * 111 * (bbox[3] - bbox[1]) * 111):.1f} km^2
+                - Approximate area: ~{_bbox_summary(tuple(bbox))['area_km2']:.1f} km^2
                 """)
 
             with tab3:
@@ -2053,102 +2590,56 @@ if search_button:
 
                 st.dataframe(display_df, use_container_width=True)
 
-                # Export button
-                csv_table = display_df.to_csv(index=False)
-                st.download_button(
-                    label="Download table as CSV",
-                    data=csv_table,
-                    file_name=f"hls_table_{start_dt.date()}_{end_dt.date()}.csv",
-                    mime="text/csv",
-                )
+                # Exports are bundled into one compressed archive so only a single payload is held per session
+                with st.expander("Downloads", expanded=False):
+                    export_buffer = io.BytesIO()
+                    with zipfile.ZipFile(export_buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+                        # CSV rows are written straight into the compressed members; no interim str is built
+                        with archive.open(f"hls_table_{start_dt.date()}_{end_dt.date()}.csv", "w") as member:
+                            display_df.to_csv(member, index=False)
+
+                        if results:
+                            weather_export = weather_df.rename(columns=_WEATHER_RENAME) if not weather_df.empty else pd.DataFrame()
+                            # Copy-on-Write: the export derives from the tab1 frame without copying it
+                            export_df = ndvi_df
+                            if not weather_export.empty:
+                                # Left join on timezone-naive calendar days held in the index, not key columns
+                                weather_days = pd.DatetimeIndex(pd.to_datetime(weather_export['date'])).normalize()
+                                weather_export = weather_export.set_index(weather_days).drop(columns=['date'])
+                                scene_days = pd.DatetimeIndex(pd.to_datetime(export_df['date'])).tz_localize(None).normalize()
+                                export_df = (
+                                    export_df.set_index(scene_days)
+                                    .join(weather_export, how='left')
+                                    .reset_index(drop=True)
+                                )
+                            with archive.open(f"hls_ndvi_weather_{start_dt.date()}_{end_dt.date()}.csv", "w") as member:
+                                export_df.to_csv(member, index=False)
 
-                if results:
-                    weather_export = weather_df.copy() if not weather_df.empty else pd.DataFrame()
-                    export_df = pd.DataFrame(results).sort_values('date')
-                    if not weather_export.empty:
-                        # Normalize dates to timezone-naive and date-only for proper matching
-                        export_df['date_normalized'] = pd.to_datetime(export_df['date']).dt.tz_localize(None).dt.date
-                        weather_export['date_normalized'] = pd.to_datetime(weather_export['date']).dt.date
-                        
-                        weather_export = weather_export.rename(columns={
-                            'temperature_mean': 'temperature_deg_c',
-                            'humidity_mean': 'humidity_pct',
-                            'cloudcover_mean': 'cloudcover_pct',
-                            'wind_speed_mean': 'wind_speed_mps',
-                            'clarity_index': 'clarity_pct',
-                        })
-                        
-                        export_df = export_df.merge(
-                            weather_export.drop(columns=['date']), 
-                            left_on='date_normalized', 
-                            right_on='date_normalized', 
-                            how='left'
-                        )
-                        export_df = export_df.drop(columns=['date_normalized'])
-                    csv_results = export_df.to_csv(index=False)
                     st.download_button(
-                        label="Download NDVI + weather (CSV)",
-                        data=csv_results,
-                        file_name=f"hls_ndvi_weather_{start_dt.date()}_{end_dt.date()}.csv",
-                        mime="text/csv",
+                        label="Download table + NDVI/weather (ZIP)" if results else "Download table (ZIP)",
+                        data=export_buffer.getvalue(),
+                        file_name=f"hls_export_{start_dt.date()}_{end_dt.date()}.zip",
+                        mime="application/zip",
                     )
 else:
     # First-run instructions
-    st.info("""
-    ### Welcome to HLS Crop Monitor!
-
-    **What you can do with this app:**
-    - Retrieve HLS (Harmonized Landsat Sentinel-2) imagery at 30 m resolution
-    - Analyse NDVI time series to track canopy vigor
-    - Compare management zones across multiple observation dates
-
-    **To get started:**
-    1. Request a free token at https://urs.earthdata.nasa.gov/
-    2. Provide the area of interest in the sidebar
-    3. Choose the time range
-    4. Select "Search scenes"
-
-    **NDVI interpretation guidance:**
-    - < 0.2: Bare soil, standing water, or senescing vegetation
-    - 0.2-0.4: Emerging canopy or stressed plants
-    - 0.4-0.6: Healthy vegetative growth
-    - > 0.6: Peak foliage; monitor for disease and nutrient demand
-    """)
+    st.info(_WELCOME_MD)
 
     # Example AOIs
     st.markdown("### Sample AOIs to try")
 
-    st.markdown("""
-    **Sun Valley Potatoes (ID, USA)**  
-    - Use the bundled `geojsons/sun_valley_potatoes.json`
-    - Suggested season: May-August
-    """)
+    st.markdown(_SAMPLE_AOIS_MD)
 
     col1, col2 = st.columns(2)
 
     with col1:
-        st.markdown("""
-        **Snake River Plain Center Pivots (ID, USA)**  
-        Large irrigated potato blocks near American Falls
-        - Center: 42.7730 deg N, -112.8480 deg W
-        - Suggested radius: 6 km
-        """)
+        st.markdown(_SAMPLE_AOI_SNAKE_RIVER_MD)
 
     with col2:
-        st.markdown("""
-        **Red River Valley Fields (ND/MN, USA)**  
-        Loamy soils with intensive potato production
-        - Center: 47.8100 deg N, -96.8200 deg W
-        - Suggested radius: 6 km
-        """)
+        st.markdown(_SAMPLE_AOI_RED_RIVER_MD)
 # Footer
 st.markdown("---")
-st.markdown("""
-<div style='text-align: center; color: gray;'>
-    <p>HLS Crop Monitor v1.0 | Data source: NASA HLS v2.0 | Built with Streamlit</p>
-    <p><small>Data provided by NASA LP DAAC via the CMR-STAC API</small></p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 
 
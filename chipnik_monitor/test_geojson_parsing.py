@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script to verify GeoJSON text parsing used by the dashboard and the API
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add the current directory to sys.path to import the monitor module
+sys.path.insert(0, str(Path(__file__).parent))
+
+from chipnik_monitor import extract_geometry_from_geojson
+
+SQUARE = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+SHIFTED = {"type": "Polygon", "coordinates": [[[1, 0], [2, 0], [2, 1], [1, 1], [1, 0]]]}
+
+
+def test_null_geometry_feature_is_skipped():
+    """A FeatureCollection with a null-geometry feature parses like the dict path"""
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": {}, "geometry": SQUARE},
+            {"type": "Feature", "properties": {}, "geometry": None},
+        ],
+    }
+    geometry = extract_geometry_from_geojson(json.dumps(collection))
+    assert geometry.geom_type == "Polygon", geometry.geom_type
+    assert geometry.bounds == (0.0, 0.0, 1.0, 1.0), geometry.bounds
+
+
+def test_feature_collection_is_dissolved():
+    """Adjacent features are unioned, whatever the key order of the root object"""
+    collection = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": {"type": "FeatureCollection"}, "geometry": SQUARE},
+            {"type": "Feature", "properties": {}, "geometry": SHIFTED},
+        ],
+    }
+    reordered = {"features": collection["features"], "type": "FeatureCollection"}
+    for payload in (collection, reordered):
+        geometry = extract_geometry_from_geojson(json.dumps(payload))
+        assert geometry.geom_type == "Polygon", geometry.geom_type
+        assert geometry.bounds == (0.0, 0.0, 2.0, 1.0), geometry.bounds
+
+
+def test_geometry_collection_is_kept():
+    """Literal GeometryCollections pass through undissolved, even with a FeatureCollection-looking member"""
+    payload = {"type": "GeometryCollection", "geometries": [SQUARE, SHIFTED], "note": {"type": "FeatureCollection"}}
+    geometry = extract_geometry_from_geojson(json.dumps(payload))
+    assert geometry.geom_type == "GeometryCollection", geometry.geom_type
+
+
+def test_malformed_text_raises_value_error():
+    """Broken text surfaces as ValueError so callers report it as bad input"""
+    try:
+        extract_geometry_from_geojson('{"type": "Polygon", "coordinates": [[[0, 0]')
+    except ValueError:
+        return
+    raise AssertionError("malformed GeoJSON did not raise ValueError")
+
+
+def main():
+    """Run all tests"""
+    tests = [
+        test_null_geometry_feature_is_skipped,
+        test_feature_collection_is_dissolved,
+        test_geometry_collection_is_kept,
+        test_malformed_text_raises_value_error,
+    ]
+    ok = True
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+            ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
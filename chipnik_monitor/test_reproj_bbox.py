@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test script to verify _reproj_bbox bounds sub-degree AOIs tightly in UTM
+"""
+
+import sys
+from pathlib import Path
+
+from pyproj import CRS, Transformer
+
+# Add the current directory to sys.path to import the monitor module
+sys.path.insert(0, str(Path(__file__).parent))
+
+from chipnik_monitor import _reproj_bbox
+
+# Sub-degree AOIs as sent by the dashboard, paired with the HLS tile's UTM zone.
+# The first straddles its zone's central meridian (-117), where edges bow furthest between samples.
+AOIS = [
+    ("EPSG:32611", (-117.45, 45.00, -116.55, 45.90)),
+    ("EPSG:32611", (-117.90, 33.60, -117.10, 34.30)),
+    ("EPSG:32610", (-121.95, 37.20, -121.05, 38.05)),
+    ("EPSG:32633", (14.05, 52.10, 14.95, 52.95)),
+]
+REFERENCE_DENSIFY_PTS = 201
+TOLERANCE_M = 1.0
+
+
+def test_reproj_bbox_matches_dense_reference():
+    """_reproj_bbox must agree with a heavily densified transform within a metre"""
+    print("\n🔬 Testing _reproj_bbox against a dense reference...")
+
+    for crs, bbox in AOIS:
+        reference = Transformer.from_crs("EPSG:4326", crs, always_xy=True).transform_bounds(
+            *bbox, densify_pts=REFERENCE_DENSIFY_PTS
+        )
+        bounds = _reproj_bbox(CRS.from_user_input(crs).to_wkt(), bbox)
+        drift = max(abs(a - b) for a, b in zip(bounds, reference))
+        print(f"   {crs} {bbox}: max drift {drift:.4f} m")
+        assert drift < TOLERANCE_M, f"{crs} {bbox} drifted {drift:.4f} m"
+
+    print("✅ _reproj_bbox stays within tolerance")
+
+
+def main():
+    """Run all tests"""
+    try:
+        test_reproj_bbox_matches_dense_reference()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)